@@ -1,21 +1,41 @@
+import numpy as np
+
+
 class Cluster(object):
     """ Object for grouping sets of sites. """
 
-    def __init__(self, sites):
+    def __init__(self, sites, lattice, neighbors=None):
         """
         Initialize a cluster instance.
 
+        Sites are stored as a sorted array of site id numbers; coordinate,
+        label and neighbor information is read from the lookup tables on
+        the parent lattice.
+
         Args:
-            sites (list(Site)): The list of sites that make up the cluster.
+            sites (list(Site)|np.array): The sites that make up the
+                cluster, as Site objects or an array of site id numbers.
+            lattice (Lattice): The lattice the sites belong to.
+            neighbors (np.array, optional): Precomputed sorted array of
+                neighboring site id numbers; derived from the lattice
+                tables if not given. (Default: None)
 
         Returns:
             None
         """
-        self.sites = set(sites)
-        self.neighbors = set()
-        for s in self.sites:
-            self.neighbors.update(s.p_neighbors)
-        self.neighbors = self.neighbors.difference(self.sites)
+        self.lattice = lattice
+        ids = np.array(
+            [s.number if hasattr(s, 'number') else s for s in sites],
+            dtype=np.int32,
+        )
+        self.sites = np.unique(ids)
+        if neighbors is None:
+            neighbors = np.setdiff1d(
+                np.unique(lattice.site_neighbor_table[self.sites]),
+                self.sites,
+                assume_unique=True,
+            )
+        self.neighbors = neighbors
 
     def merge(self, other_cluster):
         """
@@ -27,18 +47,18 @@ class Cluster(object):
         Returns:
             (Cluster): The combination of both clusters.
         """
-        new_cluster = Cluster(self.sites | other_cluster.sites)
-        new_cluster.neighbors = (
-            self.neighbors | other_cluster.neighbors).difference(
-                new_cluster.sites
-            )
+        new_sites = np.union1d(self.sites, other_cluster.sites)
+        new_neighbors = np.setdiff1d(
+            np.union1d(self.neighbors, other_cluster.neighbors),
+            new_sites,
+            assume_unique=True,
         )
-        return new_cluster
+        return Cluster(new_sites, self.lattice, neighbors=new_neighbors)
 
     def is_neighboring(self, other_cluster):
         """
-        Logical check whether the neighbor list for cluster A includes any site
-        in cluster B
+        Logical check whether the neighbor list for cluster A includes any
+        site in cluster B.
 
         Args:
             other_cluster (Cluster): The other cluster we are testing for
@@ -47,7 +67,20 @@ class Cluster(object):
         Returns:
             bool: True if the other cluster neighbors this cluster.
         """
-        return bool(self.neighbors & other_cluster.sites)
+        return bool(np.isin(other_cluster.sites, self.neighbors).any())
+
+    def remove_sites_from_neighbors(self, site_labels):
+        """
+        Remove sites with the given labels from the neighbor set.
+
+        Args:
+            site_labels (set(str)|list(str)): Labels of sites to remove.
+
+        Returns:
+            None
+        """
+        labels = self.lattice.site_label_table[self.neighbors]
+        self.neighbors = self.neighbors[~np.isin(labels, list(site_labels))]
 
     def size(self):
         """
@@ -57,32 +90,31 @@ class Cluster(object):
             None
 
         Returns:
-            None
+            (int): The number of sites.
         """
         return len(self.sites)
 
     def sites_at_edges(self):
         """
-        Finds the six sites with the max and min coordinates along x, y, and z.
+        Finds the six sets of sites with the max and min coordinates along
+        x, y, and z.
 
         Args:
             None
 
         Returns:
-            list(list): In the order [+x, -x, +y, -y, +z, -z]
+            (tuple(np.array)): Site id numbers, in the order
+            [+x, -x, +y, -y, +z, -z].
         """
-        min_x = min([s.r[0] for s in self.sites])
-        max_x = max([s.r[0] for s in self.sites])
-        min_y = min([s.r[1] for s in self.sites])
-        max_y = max([s.r[1] for s in self.sites])
-        min_z = min([s.r[2] for s in self.sites])
-        max_z = max([s.r[2] for s in self.sites])
-        x_max = [s for s in self.sites if s.r[0] == min_x]
-        x_min = [s for s in self.sites if s.r[0] == max_x]
-        y_max = [s for s in self.sites if s.r[1] == min_y]
-        y_min = [s for s in self.sites if s.r[1] == max_y]
-        x_max = [s for s in self.sites if s.r[2] == min_z]
-        x_min = [s for s in self.sites if s.r[2] == max_z]
+        coords = self.lattice.site_coord_table[self.sites]
+        mins = coords.min(axis=0)
+        maxs = coords.max(axis=0)
+        x_max = self.sites[coords[:, 0] == maxs[0]]
+        x_min = self.sites[coords[:, 0] == mins[0]]
+        y_max = self.sites[coords[:, 1] == maxs[1]]
+        y_min = self.sites[coords[:, 1] == mins[1]]
+        z_max = self.sites[coords[:, 2] == maxs[2]]
+        z_min = self.sites[coords[:, 2] == mins[2]]
         return (x_max, x_min, y_max, y_min, z_max, z_min)
 
     def is_periodically_contiguous(self):
@@ -94,20 +126,14 @@ class Cluster(object):
             None
 
         Returns:
-            (bool, bool, bool): Contiguity along the x, y, and z coordinates.
+            (bool, bool, bool): Contiguity along the x, y, and z
+            coordinates.
         """
         edges = self.sites_at_edges()
-        is_contiguous = [False, False, False]
-        along_x = any(
-            [s2 in s1.p_neighbors for s1 in edges[0] for s2 in edges[1]]
-        )
-        along_y = any(
-            [s2 in s1.p_neighbors for s1 in edges[2] for s2 in edges[3]]
-        )
-        along_z = any(
-            [s2 in s1.p_neighbors for s1 in edges[4] for s2 in edges[5]]
-        )
-        return (along_x, along_y, along_z)
-
-
-
+        neighbor_table = self.lattice.site_neighbor_table
+        along = []
+        for axis in range(3):
+            plus, minus = edges[2 * axis], edges[2 * axis + 1]
+            neighbors = np.unique(neighbor_table[plus])
+            along.append(bool(np.isin(minus, neighbors).any()))
+        return tuple(along)
@@ -0,0 +1,607 @@
+""" Gauge field defined on the links of a periodic hypercubic lattice. """
+
+import itertools as it
+import multiprocessing as mp
+
+import numpy as np
+from numba import njit, prange
+
+from lattice_gauge_theory import utils
+from lattice_gauge_theory.lattice import GaugeLattice
+
+
+@njit(parallel=True, cache=True)
+def _energy_zn(links, nn, pairs, table, inv, action_lut):
+    """
+    Total plaquette action of a link configuration.
+
+    Args:
+        links (np.array): (num_sites, num_dims) link variables.
+        nn (np.array): (num_sites, num_dims) forward-neighbor flat site
+            indices.
+        pairs (np.array): (num_pairs, 2) plaquette plane directions.
+        table (np.array): (N, N) group Cayley table.
+        inv (np.array): (N,) group inverses.
+        action_lut (np.array): (N,) action of each group element.
+
+    Returns:
+        (float): The plaquette action summed over every site and plane.
+    """
+    num_sites = links.shape[0]
+    num_pairs = pairs.shape[0]
+    total = 0.0
+    for n in prange(num_sites):
+        partial = 0.0
+        for p in range(num_pairs):
+            d1 = pairs[p, 0]
+            d2 = pairs[p, 1]
+            a = links[n, d1]
+            b = links[nn[n, d1], d2]
+            c = links[nn[n, d2], d1]
+            d = links[n, d2]
+            g = table[table[table[a, b], inv[c]], inv[d]]
+            partial += action_lut[g]
+        total += partial
+    return total
+
+
+def _replica_step(args):
+    """
+    Run one independent replica at a single coupling.
+
+    Module-level so it can be dispatched to a multiprocessing worker;
+    each replica builds its own field, seeds its own generator, and
+    thermalizes from a fresh hot start.
+
+    Args:
+        args (tuple): (shape, group, action, beta, neq, nstat, relax,
+            seed).
+
+    Returns:
+        (tuple(float)): Mean energy, mean squared energy and standard
+        deviation over 'nstat' measurements.
+    """
+    shape, group, action, beta, neq, nstat, relax, seed = args
+    field = Field(GaugeLattice(shape), group, action, B=beta, init='cold')
+    field._rng = np.random.default_rng(seed)
+    field.initialize('rand')
+    field.sweep(neq)
+    return field.stats(nstat, relax)
+
+
+class Field(object):
+    """ Group-valued gauge field with local Metropolis dynamics. """
+
+    def __init__(self, lattice, group, action, B=1.0, init='rand'):
+        """
+        Initialize a Field instance.
+
+        Args:
+            lattice (GaugeLattice): The lattice holding the link variables.
+            group (IntGroup): The gauge group.
+            action (callable): Single-plaquette action as a function of the
+                plaquette group element.
+            B (float): Inverse coupling beta. (Default: 1.0)
+            init (str): Initial configuration, 'rand' or 'cold'.
+                (Default: 'rand')
+
+        Returns:
+            None
+        """
+        self.group = group
+        self.lattice = lattice
+        self.action = action
+        self.shape = lattice.shape
+        self.num_dims = lattice.num_dims
+        self.num_plaquettes = (
+            lattice.num_sites * self.num_dims * (self.num_dims - 1) // 2
+        )
+        # contiguous copies of the group tables for the compiled kernel
+        self._table = np.ascontiguousarray(group.table)
+        self._inv = np.ascontiguousarray(group.inv)
+        self._action_lut = np.array(
+            [action(i) for i in range(group.size)], dtype=np.float64
+        )
+        # for integer-valued actions the possible dS form a small discrete
+        # set, so the Boltzmann factors can be tabulated once per beta
+        self._int_action = bool(
+            np.allclose(self._action_lut, np.round(self._action_lut))
+        )
+        self._exp_off = int(
+            round(
+                2 * (self.num_dims - 1)
+                * (self._action_lut.max() - self._action_lut.min())
+            )
+        )
+        self.B = B
+        self._is_xor = group.is_xor_group
+        self._is_cyclic = group.is_cyclic
+        self._plaq_idx = lattice.plaquette_index_table()
+        self._dim_pairs = np.array(
+            list(it.combinations(range(self.num_dims), 2))
+        )
+        self._pair_index = {
+            (d1, d2): p for p, (d1, d2) in enumerate(
+                it.combinations(range(self.num_dims), 2)
+            )
+        }
+        self._rng = np.random.default_rng()
+        self.initialize(init)
+
+    @property
+    def B(self):
+        """ Inverse coupling; setting it refreshes the Boltzmann table. """
+        return self._B
+
+    @B.setter
+    def B(self, value):
+        self._B = value
+        if self._int_action:
+            K = self._exp_off
+            self._exp_lut = np.exp(-value * np.arange(-K, K + 1))
+        else:
+            self._exp_lut = None
+
+    def initialize(self, how='rand'):
+        """
+        Initialize the link variables.
+
+        Args:
+            how (str): 'rand' for a hot start, 'cold' for all-identity
+                links. (Default: 'rand')
+
+        Returns:
+            None
+        """
+        links = self.lattice.links
+        if how == 'rand':
+            # fill the existing buffer rather than allocating a new one
+            links[...] = self._rng.integers(
+                0, self.group.size, size=links.shape, dtype=links.dtype
+            )
+        elif how == 'cold':
+            links[...] = self.group.id
+        else:
+            raise ValueError(how)
+        # inverse mirror of the link field, kept in sync by the update
+        # paths so plaquette products never apply the inverse table to
+        # gathered subarrays (the last two factors of every plaquette
+        # enter inverted)
+        self._links_inv = self._inv[links]
+        # running total action, maintained incrementally by the update
+        # paths so that energy() does not rescan the lattice
+        self._total_action = (
+            self.energy(method=0) * self.num_plaquettes
+        )
+
+    def Prod(self, a, b, c, d):
+        """
+        Plaquette product a * b * c^-1 * d^-1.
+
+        Args:
+            a, b, c, d (int): Indices of the four link variables, in the
+                traversal order returned by 'site_plaquette'.
+
+        Returns:
+            (int): Index of the product.
+        """
+        if self._is_xor:
+            return a ^ b ^ c ^ d
+        inv = self._inv
+        return self.group.prod4(a, b, inv[c], inv[d])
+
+    def _plaq_prod(self, a, b, c, d):
+        """
+        Vectorized plaquette product over gathered link arrays.
+
+        Args:
+            a, b (np.array): The first two link variables of each
+                plaquette, gathered from the link field.
+            c, d (np.array): The last two link variables, gathered from
+                the inverse mirror (they enter the product inverted).
+
+        Returns:
+            (np.array): Plaquette group elements.
+        """
+        if self._is_xor:
+            return a ^ b ^ c ^ d
+        if self._is_cyclic:
+            # Z(N) multiplies by phase addition; widen before summing
+            # so four uint8 phases cannot wrap
+            return (
+                a.astype(np.int16) + b + c + d
+            ) % self.group.size
+        table = self._table
+        return table[table[table[a, b], c], d]
+
+    def site_plaquette(self, s, d1, d2, ret='t'):
+        """
+        The four links of the plaquette at site 's' in the (d1, d2) plane.
+
+        's' must be a tuple of site coordinates; scalar sites are no
+        longer promoted.
+
+        Args:
+            s (tuple(int)): Site coordinates.
+            d1 (int): First plane direction.
+            d2 (int): Second plane direction.
+            ret (str): 't' returns four link index tuples, 'i' returns
+                the matching row of the precomputed flat-index table.
+                (Default: 't')
+
+        Returns:
+            (tuple(tuple(int))|np.array): Four links in traversal order;
+            the last two enter the plaquette product inverted.
+        """
+        D1, D2 = (d1, d2) if d1 < d2 else (d2, d1)
+        if ret == 'i':
+            n = np.ravel_multi_index(tuple(s), self.shape)
+            return self.lattice.plaq_index[n, self._pair_index[(D1, D2)]]
+        base = tuple(s)
+        idx0 = base + (D1,)
+        idx1 = (base[:D1] + ((base[D1] + 1) % self.shape[D1],)
+                + base[D1 + 1:] + (D2,))
+        idx2 = (base[:D2] + ((base[D2] + 1) % self.shape[D2],)
+                + base[D2 + 1:] + (D1,))
+        idx3 = base + (D2,)
+        return idx0, idx1, idx2, idx3
+
+    def plaquette(self, s, d1, d2):
+        """
+        Group element of the plaquette at site 's' in the (d1, d2) plane.
+
+        Args:
+            s (tuple(int)): Site coordinates.
+            d1 (int): First plane direction.
+            d2 (int): Second plane direction.
+
+        Returns:
+            (int): Index of the plaquette product.
+        """
+        l0, l1, l2, l3 = self.site_plaquette(s, d1, d2)
+        links = self.lattice.links
+        return self.Prod(links[l0], links[l1], links[l2], links[l3])
+
+    def energy(self, method=None):
+        """
+        Average plaquette action of the current configuration.
+
+        The default reads the running total maintained by the update
+        paths, which is O(1); pass a method to force a full pass over
+        the lattice.
+
+        Args:
+            method (int, optional): 0 for the vectorized NumPy gather,
+                2 for the compiled kernel; None reads the incremental
+                total. (Default: None)
+
+        Returns:
+            (float): The action per plaquette.
+        """
+        if method is None:
+            return self._total_action / self.num_plaquettes
+        if method == 0:
+            L = self.lattice.links.ravel()
+            Li = self._links_inv.ravel()
+            idx = self._plaq_idx
+            g = self._plaq_prod(
+                L[idx[:, 0]], L[idx[:, 1]], Li[idx[:, 2]], Li[idx[:, 3]]
+            )
+            return self._action_lut[g].sum() / self.num_plaquettes
+        pairs = self._dim_pairs
+        links = self.lattice.links.reshape(
+            self.lattice.num_sites, self.num_dims
+        )
+        e = _energy_zn(
+            links, self.lattice.nn, pairs, self._table, self._inv,
+            self._action_lut,
+        )
+        return e / self.num_plaquettes
+
+    def link_action(self, l, val=None):
+        """
+        Summed action of the plaquettes containing link 'l'.
+
+        Args:
+            l (tuple(int)): Link index tuple (site coordinates + direction).
+            val (int, optional): Trial value for the link; if None, the
+                current value is used. (Default: None)
+
+        Returns:
+            (float): Sum of the actions of the plaquettes touching 'l'.
+        """
+        fl = np.ravel_multi_index(tuple(l), self.shape + (self.num_dims,))
+        idx = self.lattice.per_link_plaq_idx[fl]
+        L = self.lattice.links.ravel()
+        Li = self._links_inv.ravel()
+        a = L[idx[:, 0]]
+        b = L[idx[:, 1]]
+        c = Li[idx[:, 2]]
+        d = Li[idx[:, 3]]
+        if val is not None:
+            a[idx[:, 0] == fl] = val
+            b[idx[:, 1] == fl] = val
+            val_inv = self._inv[val]
+            c[idx[:, 2] == fl] = val_inv
+            d[idx[:, 3] == fl] = val_inv
+        g = self._plaq_prod(a, b, c, d)
+        return self._action_lut[g].sum()
+
+    def accept(self, a_old, a_new, B):
+        """
+        Metropolis accept/reject test for a proposed link update.
+
+        Args:
+            a_old (float): Local action of the current link value.
+            a_new (float): Local action of the proposed link value.
+            B (float): Inverse coupling.
+
+        Returns:
+            (bool): True if the proposal is accepted.
+        """
+        d = a_new - a_old
+        if d <= 0:
+            return True
+        if self._exp_lut is not None and B == self._B:
+            p = self._exp_lut[int(round(d)) + self._exp_off]
+            return p > self._rng.random()
+        return utils.metropolis(a_old, a_new, B)
+
+    def update(self, i, new_g):
+        """
+        Propose setting link 'i' to 'new_g' and accept or reject it.
+
+        Args:
+            i (tuple(int)): Link index tuple.
+            new_g (int): Proposed group element.
+
+        Returns:
+            (bool): True if the proposal was accepted.
+        """
+        a_old = self.link_action(i)
+        a_new = self.link_action(i, new_g)
+        if self.accept(a_old, a_new, self.B):
+            self.lattice.links[tuple(i)] = new_g
+            self._links_inv[tuple(i)] = self._inv[new_g]
+            # the plaquettes touching link i are counted once each in
+            # link_action, so the local difference is the global one
+            self._total_action += a_new - a_old
+            return True
+        return False
+
+    def rand_update(self, n=1):
+        """
+        Propose 'n' updates of randomly chosen links.
+
+        Args:
+            n (int): Number of proposals. (Default: 1)
+
+        Returns:
+            (int): The number of accepted proposals.
+        """
+        D = self.num_dims
+        N = self.group.size
+        links = self.lattice.links
+        # draw all link coordinates and proposal offsets up front; an
+        # offset in 1..N-1 guarantees the proposal differs from the
+        # current value, so no rejection loop is needed
+        coords = self._rng.integers(0, self.shape + (D,), size=(n, D + 1))
+        offsets = self._rng.integers(1, N, size=n)
+        update = self.update
+        accepted = 0
+        for k in range(n):
+            i = tuple(coords[k])
+            new_g = (links[i] + offsets[k]) % N
+            accepted += update(i, new_g)
+        return accepted
+
+    def _sweep_color(self, color):
+        """
+        Propose and resolve batched updates for one color of links.
+
+        Links of a single color share no plaquette, so every proposal in
+        the batch sees a consistent environment and the whole color can
+        be accepted or rejected in one vectorized pass.
+
+        Args:
+            color (np.array): Flat indices of the links in this color.
+
+        Returns:
+            (int): The number of accepted proposals.
+        """
+        L = self.lattice.links.ravel()
+        Li = self._links_inv.ravel()
+        N = self.group.size
+        lut = self._action_lut
+        idx = self.lattice.per_link_plaq_idx[color]
+        a = L[idx[..., 0]]
+        b = L[idx[..., 1]]
+        c = Li[idx[..., 2]]
+        d = Li[idx[..., 3]]
+        a_old = lut[self._plaq_prod(a, b, c, d)].sum(axis=1)
+        old = L[color]
+        # offset by 1..N-1 so every proposal differs from the current value
+        new = (old + self._rng.integers(1, N, size=old.shape)) % N
+        new_inv = self._inv[new]
+        m = color[:, None]
+        a = np.where(idx[..., 0] == m, new[:, None], a)
+        b = np.where(idx[..., 1] == m, new[:, None], b)
+        c = np.where(idx[..., 2] == m, new_inv[:, None], c)
+        d = np.where(idx[..., 3] == m, new_inv[:, None], d)
+        a_new = lut[self._plaq_prod(a, b, c, d)].sum(axis=1)
+        dS = a_new - a_old
+        if self._exp_lut is not None:
+            p = self._exp_lut[np.round(dS).astype(int) + self._exp_off]
+            acc = (dS <= 0) | (p > self._rng.random(dS.shape))
+        else:
+            acc = utils.metropolis_array(dS, self._B, rng=self._rng)
+        L[color[acc]] = new[acc]
+        Li[color[acc]] = new_inv[acc]
+        self._total_action += dS[acc].sum()
+        return int(acc.sum())
+
+    def sweep(self, num_sweeps=1, method='color'):
+        """
+        Perform full lattice sweeps of Metropolis updates.
+
+        Args:
+            num_sweeps (int): Number of sweeps; each sweep proposes one
+                update per link. (Default: 1)
+            method (str): 'color' resolves whole independent link colors
+                in vectorized batches, 'seq' proposes one link at a time
+                in lattice order. (Default: 'color')
+
+        Returns:
+            None
+        """
+        # bind the per-iteration lookups once; the attribute chains
+        # otherwise get resolved on every link of every sweep
+        colors = self.lattice.link_colors
+        sweep_color = self._sweep_color
+        update = self.update
+        D = self.num_dims
+        N = self.group.size
+        for _ in range(num_sweeps):
+            if method == 'color':
+                for color in colors:
+                    sweep_color(color)
+            else:
+                # one batched draw per sweep from the field's generator,
+                # so seeded runs stay reproducible on this path too
+                new_g = self._rng.integers(
+                    0, N, size=self.lattice.num_links
+                )
+                k = 0
+                for s in utils.multirange(self.shape):
+                    for d in range(D):
+                        update(s + (d,), new_g[k])
+                        k += 1
+
+    def stats(self, n, relax=1):
+        """
+        Measure the energy over 'n' measurements separated by sweeps.
+
+        Args:
+            n (int): Number of measurements.
+            relax (int): Sweeps between successive measurements.
+                (Default: 1)
+
+        Returns:
+            (tuple(float)): Mean energy, mean squared energy, and the
+            standard deviation of the energy.
+        """
+        energy = np.empty(n)
+        for k in range(n):
+            self.sweep(relax)
+            energy[k] = self.energy()
+        return energy.mean(), np.mean(energy ** 2), energy.std()
+
+    def phase_sweep(self, betas, neq=10, nstat=10, relax=1, nproc=None):
+        """
+        Measure the energy across a range of couplings.
+
+        The field is re-initialized and re-thermalized at each beta, so
+        successive couplings are statistically independent; with 'nproc'
+        set, the betas are farmed out to a process pool as independent
+        replicas with deterministic per-replica seeds.
+
+        Args:
+            betas (np.array): Inverse couplings to visit.
+            neq (int): Equilibration sweeps per beta. (Default: 10)
+            nstat (int): Measurements per beta. (Default: 10)
+            relax (int): Sweeps between measurements. (Default: 1)
+            nproc (int, optional): Number of worker processes; runs
+                sequentially if None. (Default: None)
+
+        Returns:
+            (tuple(np.array)): Mean energy, mean squared energy and
+            standard deviation at each beta.
+        """
+        n = len(betas)
+        if nproc:
+            args = [
+                (self.shape, self.group, self.action, betas[k],
+                 neq, nstat, relax, k)
+                for k in range(n)
+            ]
+            # spawn rather than fork: the compiled kernels start worker
+            # threads, and forking a threaded process can deadlock
+            with mp.get_context('spawn').Pool(nproc) as pool:
+                results = pool.map(_replica_step, args)
+            energy, energy2, std = (np.array(r) for r in zip(*results))
+            return energy, energy2, std
+        energy = np.empty(n)
+        energy2 = np.empty(n)
+        std = np.empty(n)
+        for k in range(n):
+            self.B = betas[k]
+            self.initialize('rand')
+            self.sweep(neq)
+            energy[k], energy2[k], std[k] = self.stats(nstat, relax)
+        return energy, energy2, std
+
+    def hysteresis(self, betas, neq=10, nstat=10, relax=1, nproc=None):
+        """
+        Sweep the coupling without re-thermalizing between steps.
+
+        The link configuration carries over from one beta to the next, so
+        scanning the couplings up and back down exposes hysteresis near a
+        first-order transition. With 'nproc' set, the betas instead run
+        as independent pooled replicas; that trades the carried-over
+        state (and with it the memory effect) for parallelism.
+
+        Args:
+            betas (np.array): Inverse couplings to visit, in order.
+            neq (int): Equilibration sweeps per beta. (Default: 10)
+            nstat (int): Measurements per beta. (Default: 10)
+            relax (int): Sweeps between measurements. (Default: 1)
+            nproc (int, optional): Number of worker processes; runs
+                sequentially if None. (Default: None)
+
+        Returns:
+            (tuple(np.array)): Mean energy, mean squared energy and
+            standard deviation at each beta.
+        """
+        n = len(betas)
+        if nproc:
+            args = [
+                (self.shape, self.group, self.action, betas[k],
+                 neq, nstat, relax, k)
+                for k in range(n)
+            ]
+            with mp.get_context('spawn').Pool(nproc) as pool:
+                results = pool.map(_replica_step, args)
+            energy, energy2, std = (np.array(r) for r in zip(*results))
+            return energy, energy2, std
+        energy = np.empty(n)
+        energy2 = np.empty(n)
+        std = np.empty(n)
+        for k in range(n):
+            self.B = betas[k]
+            self.sweep(neq)
+            energy[k], energy2[k], std[k] = self.stats(nstat, relax)
+        return energy, energy2, std
+
+    def status(self):
+        """
+        Print the average plaquette action for each lattice plane.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        D = self.num_dims
+        plane = np.zeros((D, D))
+        pairs = self._dim_pairs
+        action = self.action
+        plaquette = self.plaquette
+        for s in utils.multirange(self.shape):
+            for (d1, d2) in pairs:
+                plane[d1, d2] += action(plaquette(s, d1, d2))
+        plane /= self.lattice.num_sites
+        print('beta = {}'.format(self.B))
+        print('energy = {}'.format(self.energy()))
+        for (d1, d2) in self._dim_pairs:
+            print('plane ({}, {}): {}'.format(d1, d2, plane[d1, d2]))
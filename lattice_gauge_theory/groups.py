@@ -0,0 +1,242 @@
+""" Finite gauge groups represented by integer Cayley tables. """
+
+from functools import lru_cache
+
+import numpy as np
+
+
+class IntGroup(object):
+    """ Finite group whose elements are the integers 0..N-1. """
+
+    def __init__(self, table, names=None):
+        """
+        Initialize an IntGroup instance.
+
+        Args:
+            table (np.array): (N, N) Cayley table, with table[a, b] giving
+                the index of the product a*b.
+            names (list(str), optional): Printable names for the group
+                elements. (Default: None)
+
+        Returns:
+            None
+        """
+        N = len(table)
+        # the elements are small non-negative ints, so a narrow dtype
+        # keeps the tables (and the link arrays indexed by them) in cache
+        dtype = np.uint8 if N <= 256 else np.uint16
+        self.table = np.ascontiguousarray(table, dtype=dtype)
+        self.size = N
+        self.names = names
+        self.id = int(
+            np.where((self.table == np.arange(N)).all(axis=1))[0][0]
+        )
+        # position of the identity in each row is that element's inverse
+        self.inv = np.argmax(self.table == self.id, axis=1).astype(dtype)
+        i = np.arange(N)
+        assert (self.table[i, self.inv] == self.id).all()
+        # left-multiplying row i by inv[i] must undo it: one broadcast
+        # checks every (i, j) pair at once
+        assert (self.table[self.inv[:, None], self.table] == i).all()
+        # groups like Klein (and Z2) are (Z/2)^k under XOR: the whole
+        # plaquette product collapses to bitwise XOR, with every element
+        # its own inverse
+        self.is_xor_group = bool(
+            np.array_equal(self.table, np.bitwise_xor.outer(i, i))
+        )
+        # cyclic groups in the standard Z(N) labeling multiply by
+        # integer addition mod N, so batched products can skip the
+        # Cayley-table gathers entirely
+        self.is_cyclic = bool(
+            np.array_equal(self.table, np.mod(i[:, None] + i, N))
+        )
+        # Cl_flat[i, j] = i * j * i^-1; column j collects the conjugates
+        # of element j, so the classes fall out of one table broadcast.
+        self.Cl_flat = self.table[
+            self.table[i[:, None], i[None, :]], self.inv[:, None]
+        ]
+        self.Cl = [np.unique(self.Cl_flat[:, j]) for j in range(N)]
+
+    def __call__(self, *a):
+        """
+        Multiply a sequence of group elements from left to right.
+
+        Args:
+            *a (int): Indices of the elements to multiply.
+
+        Returns:
+            (int): Index of the product.
+        """
+        b = a[0]
+        for i in range(1, len(a)):
+            b = self.table[b, a[i]]
+        return b
+
+    def prod2(self, a, b):
+        """
+        Product of two group elements.
+
+        Args:
+            a (int): Index of the left factor.
+            b (int): Index of the right factor.
+
+        Returns:
+            (int): Index of the product a*b.
+        """
+        return self.table[a, b]
+
+    def prod4(self, a, b, c, d):
+        """
+        Product of four group elements, fused into chained table lookups.
+
+        Specialized for the fixed arity of the plaquette product, avoiding
+        the generic variadic loop in '__call__'.
+
+        Args:
+            a, b, c, d (int): Indices of the four factors.
+
+        Returns:
+            (int): Index of the product a*b*c*d.
+        """
+        t = self.table
+        return t[t[t[a, b], c], d]
+
+    def prod_array(self, a):
+        """
+        Cumulative group product across the last axis of an index array.
+
+        Each table lookup runs as one fancy-indexed gather over the
+        whole batch, so M products of k factors cost k - 1 gathers
+        instead of an M-way Python loop; the four-factor plaquette case
+        is unrolled.
+
+        Args:
+            a (np.array): (..., k) array of element indices.
+
+        Returns:
+            (np.array): Indices of the products, shape a.shape[:-1].
+        """
+        a = np.asarray(a)
+        t = self.table
+        if a.shape[-1] == 4:
+            return t[t[t[a[..., 0], a[..., 1]], a[..., 2]], a[..., 3]]
+        out = a[..., 0].copy()
+        for i in range(1, a.shape[-1]):
+            out = t[out, a[..., i]]
+        return out
+
+
+@lru_cache(maxsize=None)
+def ZN(N):
+    """
+    The cyclic group Z(N) under addition mod N.
+
+    The construction is pure, so repeated calls with the same order
+    share one cached IntGroup (its tables are never mutated).
+
+    Args:
+        N (int): Order of the group.
+
+    Returns:
+        (IntGroup): The group, with element k representing the phase
+        exp(2*pi*i*k/N).
+    """
+    table = np.mod(np.arange(N) + np.reshape(np.arange(N), (N, 1)), N)
+    names = ['w{}'.format(k) for k in range(N)]
+    return IntGroup(table, names)
+
+
+def Klein():
+    """
+    The Klein four-group Z2 x Z2.
+
+    Args:
+        None
+
+    Returns:
+        (IntGroup): The group, with elements (1, a, b, ab).
+    """
+    table = np.array([
+        [0, 1, 2, 3],
+        [1, 0, 3, 2],
+        [2, 3, 0, 1],
+        [3, 2, 1, 0],
+    ])
+    return IntGroup(table, names=['1', 'a', 'b', 'ab'])
+
+
+def Quaternion():
+    """
+    The quaternion group Q8.
+
+    Args:
+        None
+
+    Returns:
+        (IntGroup): The group, with elements (1, -1, i, -i, j, -j, k, -k).
+    """
+    table = np.array([
+        [0, 1, 2, 3, 4, 5, 6, 7],
+        [1, 0, 3, 2, 5, 4, 7, 6],
+        [2, 3, 1, 0, 6, 7, 5, 4],
+        [3, 2, 0, 1, 7, 6, 4, 5],
+        [4, 5, 7, 6, 1, 0, 2, 3],
+        [5, 4, 6, 7, 0, 1, 3, 2],
+        [6, 7, 4, 5, 3, 2, 1, 0],
+        [7, 6, 5, 4, 2, 3, 0, 1],
+    ])
+    names = ['1', '-1', 'i', '-i', 'j', '-j', 'k', '-k']
+    return IntGroup(table, names)
+
+
+def KDaction(g):
+    """
+    Delta (Wegner) action for the Klein group.
+
+    Args:
+        g (int): Index of the plaquette group element.
+
+    Returns:
+        (float): 0 for the identity plaquette, 1 otherwise.
+    """
+    return 0.0 if g == 0 else 1.0
+
+
+def QDaction(g):
+    """
+    Delta (Wegner) action for the quaternion group.
+
+    Args:
+        g (int): Index of the plaquette group element.
+
+    Returns:
+        (float): 0 for the identity plaquette, 1 otherwise.
+    """
+    return 0.0 if g == 0 else 1.0
+
+
+class _CosAction(object):
+    """ Wilson-type Z(N) action; a class so instances can be pickled. """
+
+    def __init__(self, N):
+        self.N = N
+        # the argument is always one of N discrete phases, so the
+        # cosines are precomputed once and evaluation is a gather
+        self.cos_lut = np.cos(2 * np.pi * np.arange(N) / N)
+
+    def __call__(self, g):
+        return 1.0 - self.cos_lut[g]
+
+
+@lru_cache(maxsize=None)
+def ZNaction(N):
+    """
+    Wilson-type action for Z(N): S(k) = 1 - cos(2*pi*k/N).
+
+    Args:
+        N (int): Order of the group.
+
+    Returns:
+        (callable): The single-plaquette action.
+    """
+    return _CosAction(N)
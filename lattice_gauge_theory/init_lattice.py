@@ -1,8 +1,9 @@
 """ Functions for constructing lattices. """
 
+import itertools
+
 import numpy as np
 from lattice_gauge_theory import lattice, lattice_site
-import re
 
 def square_lattice(a, b, spacing=1.0):
     """
@@ -20,20 +21,24 @@ def square_lattice(a, b, spacing=1.0):
         The returned lattice is 3D periodic, but all sites and edges lie in the
         xy-plane.
     """
-    grid = np.array(list(range(1, a*b + 1))).reshape(a, b, order='F')
-    it = np.nditer(grid, flags=['multi_index'])
-    sites = []
-    while not it.finished:
-        x, y = it.multi_index
-        r = np.array([x*spacing, y*spacing, 0.0])
-        neighbors = [
-            np.roll(grid, +1, axis=0)[x,y],
-            np.roll(grid, -1, axis=0)[x,y],
-            np.roll(grid, +1, axis=1)[x,y],
-            np.roll(grid, -1, axis=1)[x,y],
-        ]
-        sites.append(lattice_site.Site(int(it[0]), r, neighbors, 0.0, 'L'))
-        it.iternext()
+    grid = np.arange(1, a*b + 1).reshape(a, b, order='F')
+    # whole-grid neighbor id arrays, one roll per direction; the plain
+    # itertools.product loop then just reads them, with none of
+    # nditer's per-element multi_index overhead
+    xm = np.roll(grid, +1, axis=0)
+    xp = np.roll(grid, -1, axis=0)
+    ym = np.roll(grid, +1, axis=1)
+    yp = np.roll(grid, -1, axis=1)
+    sites = [
+        lattice_site.Site(
+            int(grid[x, y]),
+            np.array([x*spacing, y*spacing, 0.0]),
+            [xm[x, y], xp[x, y], ym[x, y], yp[x, y]],
+            0.0,
+            'L',
+        )
+        for x, y in itertools.product(range(a), range(b))
+    ]
     return lattice.Lattice(sites, cell_lengths=np.array([a, b, 0.0])*spacing)
 
 def cubic_lattice(a, b, c, spacing):
@@ -49,21 +54,24 @@ def cubic_lattice(a, b, c, spacing):
     Returns:
         (Lattice): The initialized lattice.
     """
-    grid = np.array(list(range(1, a*b*c + 1))).reshape(a, b, c, order='F')
-    it = np.nditer(grid, flags=['multi_index'])
-    while not it.finished:
-        x, y, z = it.multi_index
-        r = np.array([x, y, z]) * spacing
-        neighbors = [
-            np.roll(grid, +1, axis=0)[x,y,z],
-            np.roll(grid, -1, axis=0)[x,y,z],
-            np.roll(grid, +1, axis=1)[x,y,z],
-            np.roll(grid, -1, axis=1)[x,y,z],
-            np.roll(grid, +1, axis=2)[x,y,z],
-            np.roll(grid, -1, axis=2)[x,y,z],
-        ]
-        sites.append(lattice_site.Site(int(it[0]), r, neighbors, 0.0, 'L'))
-        it.iternext()
+    grid = np.arange(1, a*b*c + 1).reshape(a, b, c, order='F')
+    xm = np.roll(grid, +1, axis=0)
+    xp = np.roll(grid, -1, axis=0)
+    ym = np.roll(grid, +1, axis=1)
+    yp = np.roll(grid, -1, axis=1)
+    zm = np.roll(grid, +1, axis=2)
+    zp = np.roll(grid, -1, axis=2)
+    sites = [
+        lattice_site.Site(
+            int(grid[x, y, z]),
+            np.array([x, y, z]) * spacing,
+            [xm[x, y, z], xp[x, y, z], ym[x, y, z],
+             yp[x, y, z], zm[x, y, z], zp[x, y, z]],
+            0.0,
+            'L',
+        )
+        for x, y, z in itertools.product(range(a), range(b), range(c))
+    ]
     return lattice.Lattice(sites, cell_lengths=np.array([a, b, c]) *spacing)
 
 
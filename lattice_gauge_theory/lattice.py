@@ -1,8 +1,272 @@
 import numpy as np
-import random
 import itertools
-import sys
-from collections import Counter
+import math
+from functools import lru_cache
+
+from numba import njit
+
+from lattice_gauge_theory import cluster, lattice_site
+
+
+@njit(cache=True)
+def _connected_components(neighbor_table, active):
+    """
+    Union-find over the active rows of a site neighbor table.
+
+    Uses union by rank with path compression, so the whole edge list is
+    processed in near-linear time.
+
+    Args:
+        neighbor_table (np.array): (n, k) table of neighboring site id
+            numbers, indexed by site id number.
+        active (np.array): Boolean mask over site id numbers; edges with
+            an inactive endpoint are ignored.
+
+    Returns:
+        (np.array): Root site id number for every active site.
+    """
+    n = neighbor_table.shape[0]
+    parent = np.arange(n, dtype=np.int32)
+    rank = np.zeros(n, dtype=np.int8)
+    for a in range(n):
+        if not active[a]:
+            continue
+        for j in range(neighbor_table.shape[1]):
+            b = neighbor_table[a, j]
+            if not active[b]:
+                continue
+            ra = a
+            while parent[ra] != ra:
+                parent[ra] = parent[parent[ra]]
+                ra = parent[ra]
+            rb = b
+            while parent[rb] != rb:
+                parent[rb] = parent[parent[rb]]
+                rb = parent[rb]
+            if ra == rb:
+                continue
+            if rank[ra] < rank[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            if rank[ra] == rank[rb]:
+                rank[ra] += 1
+    for a in range(n):
+        if active[a]:
+            r = a
+            while parent[r] != r:
+                r = parent[r]
+            parent[a] = r
+    return parent
+
+
+@lru_cache(maxsize=None)
+def _plaq_offsets(num_dims):
+    """
+    Constant corner-offset and direction tables for the plaquettes of a
+    'num_dims'-dimensional lattice.
+
+    These depend only on the dimensionality, so they are built once per
+    ndim and shared by every lattice of that rank.
+
+    Args:
+        num_dims (int): Number of lattice dimensions.
+
+    Returns:
+        (tuple(np.array)): The (D, D, 4, D) coordinate offsets and the
+        (D, D, 4) link directions of the four links of each (d1, d2)
+        plaquette.
+    """
+    D = num_dims
+    offs = np.zeros((D, D, 4, D), dtype=int)
+    dirs = np.zeros((D, D, 4), dtype=int)
+    for d1 in range(D):
+        for d2 in range(D):
+            offs[d1, d2, 1, d1] = 1
+            offs[d1, d2, 2, d2] = 1
+            dirs[d1, d2] = (d1, d2, d1, d2)
+    return offs, dirs
+
+
+# finished table sets keyed by lattice shape: parameter sweeps and
+# pooled replicas build many lattices of identical geometry, and the
+# tables are read-only once constructed
+_plaq_table_cache = {}
+
+
+class GaugeLattice(object):
+    """ Periodic hypercubic lattice of group-valued link variables. """
+
+    def __init__(self, shape, link_dtype=np.uint8):
+        """
+        Initialize a GaugeLattice instance.
+
+        Args:
+            shape (tuple(int)): Number of sites along each dimension.
+            link_dtype (np.dtype): Storage dtype for the link variables;
+                uint8 covers any group with at most 256 elements.
+                (Default: np.uint8)
+
+        Returns:
+            None
+        """
+        self.shape = tuple(shape)
+        self.num_dims = len(self.shape)
+        self.num_sites = math.prod(self.shape)
+        self.num_links = self.num_sites * self.num_dims
+        self.links = np.zeros(
+            self.shape + (self.num_dims,), dtype=link_dtype
+        )
+        self._plaq_index_table = None
+        self.initialize_plaquette_tables()
+
+    def initialize_plaquette_tables(self):
+        """
+        Build lookup tables for the plaquettes touching each site and link.
+
+        'p_sites[s + (d1, d2, k)]' holds the k-th link of the plaquette at
+        site 's' in the (d1, d2) plane as a (coords..., direction) row,
+        'p_links[l + (k, sign)]' holds the four such rows of each
+        plaquette containing link 'l', 'nn[n, d]' holds the flat index of
+        the forward neighbor of flat site 'n' along direction 'd',
+        'per_link_plaq_idx[fl]' holds the flat link indices of the four
+        links of each of the 2*(num_dims - 1) plaquettes containing the
+        link with flat index 'fl', and 'plaq_index[n, p]' holds the flat
+        link indices of the plaquette at flat site 'n' in the p-th
+        (d1 < d2) plane.
+
+        Everything is constructed by whole-array broadcasting against a
+        coordinate mesh: a flat link index is site * num_dims + direction
+        and the forward neighbor tables turn coordinate offsets into flat
+        arithmetic, so no per-site Python iteration is needed.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        D = self.num_dims
+        shape = self.shape
+        V = self.num_sites
+        cached = _plaq_table_cache.get(shape)
+        if cached is not None:
+            (self.nn, self.p_sites, self.p_links, self.plaq_index,
+             self.per_link_plaq_idx, self.link_colors) = cached
+            return
+        base = np.stack(np.indices(shape), axis=-1)
+        coords = base.reshape(V, D)
+        flat = np.arange(V)
+        # forward and backward neighbor flat site indices, one shifted
+        # ravel per direction
+        self.nn = np.empty((V, D), dtype=int)
+        pn = np.empty((V, D), dtype=int)
+        for d in range(D):
+            c = coords.copy()
+            c[:, d] = (coords[:, d] + 1) % shape[d]
+            self.nn[:, d] = np.ravel_multi_index(tuple(c.T), shape)
+            c[:, d] = (coords[:, d] - 1) % shape[d]
+            pn[:, d] = np.ravel_multi_index(tuple(c.T), shape)
+        # the four links of the (d1, d2) plaquette sit at offsets
+        # (0, e_d1, e_d2, 0) from the base site, with directions
+        # (d1, d2, d1, d2); broadcasting the offset table against the
+        # coordinate mesh builds every plaquette at once
+        offs, dirs = _plaq_offsets(D)
+        # contiguous int32 rows: a third the footprint of the default
+        # int64 and a linear stream for whole-table gathers
+        self.p_sites = np.empty(
+            shape + (D, D, 4, D + 1), dtype=np.int32, order='C'
+        )
+        self.p_sites[..., :D] = np.mod(
+            base[..., None, None, None, :] + offs, shape
+        )
+        self.p_sites[..., D] = dirs
+        self.p_links = np.empty(
+            shape + (D, D - 1, 2, 4, D + 1), dtype=np.int32, order='C'
+        )
+        p_links = self.p_links.reshape(V, D, D - 1, 2, 4, D + 1)
+        for d1 in range(D):
+            for k, d2 in enumerate(dd for dd in range(D) if dd != d1):
+                for sign in range(2):
+                    # sign 0 is the plaquette based at the link's own
+                    # site, sign 1 the one displaced by -e_d2
+                    b = flat if sign == 0 else pn[:, d2]
+                    p_links[:, d1, k, sign, :, :D] = coords[b][
+                        :, None, :
+                    ] + offs[d1, d2]
+                    p_links[:, d1, k, sign, :, D] = dirs[d1, d2]
+        np.mod(
+            self.p_links[..., :D], shape, out=self.p_links[..., :D]
+        )
+        # flatten the coordinate rows into indices into links.ravel()
+        # with one whole-tensor ravel_multi_index per table, so every
+        # plaquette sweep is a single gather plus a reduction
+        dims = shape + (D,)
+        pairs = list(itertools.combinations(range(D), 2))
+        d1s, d2s = zip(*pairs)
+        upper = self.p_sites.reshape(V, D, D, 4, D + 1)[:, d1s, d2s]
+        self.plaq_index = np.ravel_multi_index(
+            tuple(np.moveaxis(upper, -1, 0)), dims
+        ).astype(np.int32)
+        self.per_link_plaq_idx = np.ravel_multi_index(
+            tuple(
+                np.moveaxis(
+                    p_links.reshape(
+                        self.num_links, 2 * (D - 1), 4, D + 1
+                    ),
+                    -1, 0,
+                )
+            ),
+            dims,
+        ).astype(np.int32)
+        # Independent sets for batched updates: links of one color never
+        # share a plaquette. Same-direction links conflict only when
+        # their sites are adjacent along some other dimension, so a color
+        # fixes the direction, the combined parity over the even-length
+        # dimensions, and, for each odd-length dimension, an alternating
+        # 0/1/2 class whose final site stands alone -- the periodic wrap
+        # along an odd dimension would otherwise pair two adjacent sites
+        # of equal parity. (Site parity alone is also not enough: two
+        # differently-directed links at the same site share a plaquette.)
+        self.link_colors = []
+        for d1 in range(D):
+            code = np.zeros(V, dtype=int)
+            parity = np.zeros(V, dtype=int)
+            for k in range(D):
+                if k == d1:
+                    continue
+                if shape[k] % 2 == 0:
+                    parity += coords[:, k]
+                else:
+                    cls = np.where(
+                        coords[:, k] == shape[k] - 1, 2, coords[:, k] % 2
+                    )
+                    code = code * 3 + cls
+            code = code * 2 + parity % 2
+            for v in np.unique(code):
+                self.link_colors.append(
+                    (np.where(code == v)[0] * D + d1).astype(np.int32)
+                )
+        _plaq_table_cache[shape] = (
+            self.nn, self.p_sites, self.p_links, self.plaq_index,
+            self.per_link_plaq_idx, self.link_colors,
+        )
+
+    def plaquette_index_table(self):
+        """
+        Flat link indices for every plaquette on the lattice.
+
+        Args:
+            None
+
+        Returns:
+            (np.array): (num_plaquettes, 4) int32 array whose rows hold
+            the indices into 'links.ravel()' of the four links of each
+            plaquette, in traversal order; the last two links enter the
+            plaquette product inverted.
+        """
+        if self._plaq_index_table is None:
+            self._plaq_index_table = self.plaq_index.reshape(-1, 4)
+        return self._plaq_index_table
 
 
 class Lattice(object):
@@ -25,10 +289,30 @@ class Lattice(object):
         #  self.links = sites.links
         self.number_of_sites = len(self.sites)
         #  self.number_of_links = len(self.links)
-        self.site_labels = set([site.label for site in self.sites])
+        # pack per-site data into parallel arrays; each Site.r becomes
+        # a view into its row of the position buffer, so whole-lattice
+        # coordinate operations run as single ufuncs while per-site
+        # access is unchanged
+        self.site_array = lattice_site.SiteArray(self.sites)
+        self.positions = self.site_array.positions
+        for i, site in enumerate(self.sites):
+            site.r = self.positions[i]
+        # one C-level unique over the packed label array replaces the
+        # per-site set comprehension; np.unique returns them sorted
+        unique_labels = np.unique(self.site_array.labels)
+        self.label_list = unique_labels.tolist()
+        self.site_labels = set(self.label_list)
+        # contiguous integer codes for the labels, so label comparisons
+        # over the whole lattice run on an int array instead of strings
+        codes = {label: k for k, label in enumerate(self.label_list)}
+        self.label_codes = np.array(
+            [codes[label] for label in self.site_array.labels],
+            dtype=np.int8,
+        )
         #  self.site_populations = Counter([site.label for site in self.sites])
         self.enforce_periodic_boundary_conditions()
         self.initialize_site_lookup_table()
+        self.initialize_site_tables()
         self.nn_energy = False
         #  self.cn_energies = False
         #  self.site_energies = False
@@ -41,18 +325,22 @@ class Lattice(object):
         """
         Enforce periodic boundary conditions in each dimension.
 
+        One in-place modulo over the position buffer; dimensions with
+        zero cell length (e.g. the z-axis of a planar lattice) are left
+        untouched. Coordinates sitting exactly on the upper cell
+        boundary wrap to 0.0, where the old per-site branches kept
+        them at the boundary value.
+
         Args:
             None
 
         Returns:
             None
         """
-        for s in self.sites:
-            for i in range(3):
-                if s.r[i] < 0.0:
-                    s.r[i] += self.cell_lengths[i]
-                if s.r[i] > self.cell_lengths[i]:
-                    s.r[i] -= self.cell_lengths[i]
+        np.mod(
+            self.positions, self.cell_lengths,
+            out=self.positions, where=self.cell_lengths > 0,
+        )
 
     def reset(self):
         """
@@ -65,8 +353,7 @@ class Lattice(object):
             None
         """
         self.time = 0.0
-        for site in self.sites:
-            site.time_occupied = 0.0
+        self.site_array.time_occupied[:] = 0.0
 
     def initialize_site_lookup_table(self):
         """
@@ -79,9 +366,33 @@ class Lattice(object):
         Returns:
             None
         """
-        self.site_lookup = {}
-        for site in self.sites:
-            self.site_lookup[site.number] = site
+        numbers = self.site_array.numbers
+        self.site_lookup = np.full(numbers.max() + 1, -1, dtype=np.int32)
+        self.site_lookup[numbers] = np.arange(len(self.sites))
+
+    def initialize_site_tables(self):
+        """
+        Build arrays of per-site data indexed directly by site id number,
+        so that clusters and searches can operate on contiguous int
+        arrays instead of Site objects.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        sa = self.site_array
+        n = int(sa.numbers.max()) + 1
+        num_neighbors = sa.neighbors.shape[1]
+        self.site_coord_table = np.zeros((n, 3))
+        self.site_label_table = np.empty(n, dtype=object)
+        self.site_neighbor_table = np.zeros(
+            (n, num_neighbors), dtype=np.int32
+        )
+        self.site_coord_table[sa.numbers] = sa.positions
+        self.site_label_table[sa.numbers] = sa.labels
+        self.site_neighbor_table[sa.numbers] = sa.neighbors
 
     def site_with_id(self, number):
         """
@@ -93,7 +404,7 @@ class Lattice(object):
         Returns:
             (Site): The site with id number equal to 'number'
         """
-        return self.site_lookup[number]
+        return self.sites[self.site_lookup[number]]
 
     def update(self, step):
         """
@@ -135,17 +446,21 @@ class Lattice(object):
             site_connections (dict{list[str]}): A dictionary of neighboring
             site types in the lattice.
         """
-        site_connections = {}
-        for initial_site in self.sites:
-            if not initial_site.label in site_connections:
-                site_connections[initial_site.label] = []
-            for final_site in initial_site.p_neighbors:
-                if final_site.label not in (
-                    site_connections[ initial_site.label]
-                ):
-                    site_connections[initial_site.label].append(
-                        final_site.label
-                    )
+        sa = self.site_array
+        codes = self.label_codes
+        k = sa.neighbors.shape[1]
+        # stack every (site, neighbor) label-code pair and deduplicate
+        # them in one C-level unique instead of per-site list scans
+        neighbor_codes = codes[self.site_lookup[sa.neighbors]]
+        pairs = np.unique(
+            np.stack([np.repeat(codes, k), neighbor_codes.ravel()]),
+            axis=1,
+        )
+        site_connections = {label: [] for label in self.label_list}
+        for i, j in pairs.T:
+            site_connections[self.label_list[i]].append(
+                self.label_list[j]
+            )
         return site_connections
 
     def connected_sites(self, site_labels=None):
@@ -169,24 +484,28 @@ class Lattice(object):
             sites.
         """
         if site_labels:
-            selected_sites = self.selec_sites(site_labels)
+            selected_sites = self.select_sites(site_labels)
         else:
             selected_sites = self.sites
-        initial_clusters = [cluster.Cluster([site]) for site in selected_sites]
+        numbers = np.array(
+            [site.number for site in selected_sites], dtype=np.int32
+        )
+        active = np.zeros(len(self.site_neighbor_table), dtype=np.bool_)
+        active[numbers] = True
+        # one union-find pass over the edge list replaces the quadratic
+        # merge loop over pairwise cluster comparisons
+        roots = _connected_components(self.site_neighbor_table, active)
+        final_clusters = [
+            cluster.Cluster(numbers[roots[numbers] == r], self)
+            for r in np.unique(roots[numbers])
+        ]
         if site_labels:
-            blocking_sites = self.site_labels - set(site_labels)
-            for c in initial_clusters:
+            if type(site_labels) in (list, set):
+                blocking_sites = self.site_labels - set(site_labels)
+            else:
+                blocking_sites = self.site_labels - {site_labels}
+            for c in final_clusters:
                 c.remove_sites_from_neighbors(blocking_sites)
-        final_clusters = []
-        while initial_clusters: # loop until initial_clusters is empty
-            this_cluster = initial_clusters.pop(0)
-            while this_cluster.neighbors:
-                neighboring_clusters = [c for c in initial_clusters if
-                                        this_cluster.is_neighboring(c)]
-                for nc in neighboring_clusters:
-                    initial_clusters.remove(nc)
-                    this_cluster = this_cluster.merge(nc)
-            final_clusters.append(this_cluster)
         return final_clusters
 
     def select_sites(self, site_labels):
@@ -201,12 +520,13 @@ class Lattice(object):
             list(Site): List of sites with labels given by 'site_labels'.
         """
         if type(site_labels) in (list, set):
-            selected_sites = [s for s in self.sites if s.label in site_labels]
+            wanted = list(site_labels)
         elif type(site_labels) is str:
-            selected_sites = [s for s in self.sites if s.label is site_labels]
+            wanted = [site_labels]
         else:
-            return ValueError(str(site_labels))
-        return selected_sites
+            raise ValueError(str(site_labels))
+        mask = np.isin(self.site_array.labels, wanted)
+        return [self.sites[i] for i in np.where(mask)[0]]
 
 
 
@@ -1,4 +1,45 @@
-from collections import Counter
+import numpy as np
+
+
+class SiteArray(object):
+    """ Per-site data packed into parallel NumPy arrays. """
+
+    def __init__(self, sites):
+        """
+        Initialize a SiteArray instance from a list of Site objects.
+
+        The arrays are parallel: row 'i' of each one describes
+        'sites[i]'. Whole-lattice operations (boundary wraps, counter
+        resets, label selections) run as single ufunc calls over these
+        buffers instead of attribute-at-a-time loops over the objects.
+
+        Args:
+            sites (list(Site)): The sites to pack.
+
+        Returns:
+            None
+        """
+        n = len(sites)
+        self.numbers = np.array(
+            [site.number for site in sites], dtype=np.int32
+        )
+        self.positions = np.array(
+            [site.r for site in sites], dtype=float
+        )
+        self.neighbors = np.array(
+            [site.neighbors for site in sites], dtype=np.int32
+        )
+        self.energies = np.array(
+            [site.energy for site in sites], dtype=float
+        )
+        self.occupation = np.array(
+            [site.occupation for site in sites], dtype=np.int8
+        )
+        self.labels = np.empty(n, dtype=object)
+        for i, site in enumerate(sites):
+            self.labels[i] = site.label
+        self.time_occupied = np.zeros(n)
+
 
 class Site(object):
     """ Site class. """
@@ -1,4 +1,5 @@
 class Plaquette(object):
     """ Object representing elementary plaquette in the the lattice. """
-    def __init__(self, )
+    def __init__(self):
+        pass
 
@@ -0,0 +1,145 @@
+""" Utility functions for lattice indexing and Monte Carlo updates. """
+
+import itertools as it
+import math
+import random
+
+import numpy as np
+from numba import njit
+
+
+def multirange(shape):
+    """
+    Iterate over every index tuple of an array with the given shape.
+
+    Args:
+        shape (tuple(int)): Extent along each dimension.
+
+    Returns:
+        (iterator(tuple(int))): Iterator over index tuples, in C order.
+    """
+    return it.product(*[range(n) for n in shape])
+
+
+def increment_array(a, i, n, shape):
+    """
+    Increment coordinate 'i' of an index tuple by 'n', with periodic wrap.
+
+    Args:
+        a (tuple(int)): Site or link index tuple.
+        i (int): The coordinate to increment.
+        n (int): The increment (may be negative).
+        shape (tuple(int)): Lattice shape used for the periodic wrap.
+
+    Returns:
+        (tuple(int)): The incremented index tuple.
+    """
+    a = tuple(a)
+    return a[:i] + ((a[i] + n) % shape[i],) + a[i + 1:]
+
+
+def site_plaq_links(site, d1, d2, shape):
+    """
+    The four links of the plaquette at 'site' in the (d1, d2) plane.
+
+    The links are returned in the order they are traversed:
+        U_d1(n), U_d2(n + e_d1), U_d1(n + e_d2), U_d2(n),
+    where the third and fourth links enter the plaquette product inverted.
+
+    Args:
+        site (tuple(int)): Coordinates of the plaquette's base site.
+        d1 (int): First direction spanning the plaquette plane.
+        d2 (int): Second direction spanning the plaquette plane.
+        shape (tuple(int)): Lattice shape used for the periodic wrap.
+
+    Returns:
+        (tuple(tuple(int))): Four link index tuples of length len(site) + 1.
+    """
+    site = tuple(site)
+    # plain tuple slicing: no array allocation or NumPy roundtrip per
+    # corner, just integer arithmetic on the shifted coordinate
+    s1 = site[:d1] + ((site[d1] + 1) % shape[d1],) + site[d1 + 1:]
+    s2 = site[:d2] + ((site[d2] + 1) % shape[d2],) + site[d2 + 1:]
+    return (site + (d1,), s1 + (d2,), s2 + (d1,), site + (d2,))
+
+
+def link_plaq_links(link, d2, sign, shape):
+    """
+    The four links of a plaquette containing 'link' in the (d1, d2) plane,
+    where d1 is the direction of 'link' itself.
+
+    Args:
+        link (tuple(int)): Link index tuple (site coordinates + direction).
+        d2 (int): The other direction spanning the plaquette plane.
+        sign (int): 0 for the plaquette based at the link's own site, 1 for
+            the plaquette displaced by -e_d2.
+        shape (tuple(int)): Lattice shape used for the periodic wrap.
+
+    Returns:
+        (tuple(tuple(int))): Four link index tuples.
+    """
+    site, d1 = tuple(link[:-1]), link[-1]
+    if sign:
+        site = (site[:d2] + ((site[d2] - 1) % shape[d2],)
+                + site[d2 + 1:])
+    return site_plaq_links(site, d1, d2, shape)
+
+
+@njit(cache=True, fastmath=True)
+def metropolis(s1, s2, beta):
+    """
+    Metropolis accept/reject test for a proposed local update.
+
+    Compiled to a single branch and exp call; this runs once per
+    proposal, so per-call interpreter dispatch would dominate it.
+
+    Args:
+        s1 (float): Action of the current configuration.
+        s2 (float): Action of the proposed configuration.
+        beta (float): Inverse coupling.
+
+    Returns:
+        (bool): True if the proposal is accepted.
+    """
+    d = s2 - s1
+    return d < 0.0 or math.exp(-beta * d) > random.random()
+
+
+@njit(cache=True, fastmath=True)
+def metropolis_batch(dS, beta, u):
+    """
+    Metropolis accept/reject test over a block of proposals.
+
+    Args:
+        dS (np.array): Action differences of the proposed updates.
+        beta (float): Inverse coupling.
+        u (np.array): Uniform random numbers in [0, 1), one per
+            proposal.
+
+    Returns:
+        (np.array): Boolean mask of accepted proposals.
+    """
+    acc = np.empty(dS.shape, dtype=np.bool_)
+    for k in range(dS.size):
+        acc[k] = dS[k] < 0.0 or math.exp(-beta * dS[k]) > u[k]
+    return acc
+
+
+def metropolis_array(dS, beta, rng=None):
+    """
+    Vectorized Metropolis accept/reject test.
+
+    Resolves a whole array of independent proposals with one exp, one
+    uniform draw and one comparison, each a single ufunc call.
+
+    Args:
+        dS (np.array): Action differences of the proposed updates.
+        beta (float): Inverse coupling.
+        rng (np.random.Generator, optional): Source of uniforms; the
+            global NumPy RNG is used if None. (Default: None)
+
+    Returns:
+        (np.array): Boolean mask of accepted proposals.
+    """
+    u = (rng or np.random).random(dS.shape)
+    return (dS < 0) | (np.exp(-beta * dS) > u)